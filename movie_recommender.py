@@ -1,12 +1,3 @@
-# Load datasets
-movies = ['movie_genre', 'movie_id', 'movie_name']
-ratings = ['movie_name', 'rating', 'user_id']
-
-# Load movies from file. Return dict mapping movie_name -> (movie_id, movie_genre)
-def load_movies(filename: str) -> dict:
-    return {}
-
-# Load ratings. Return dict mapping movie_name -> list of (user_id, rating)
 #!/usr/bin/env python3
 """movie_recommender.py
 
@@ -30,11 +21,15 @@ This script focuses on correctness and reasonable input validation (skips malfor
 """
 
 import csv
+import heapq
 import logging
+import math
 import os
 import sys
-from collections import defaultdict
-from typing import Dict, List, Tuple
+from array import array
+from itertools import chain, filterfalse, islice
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -42,6 +37,39 @@ logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 # Types
 MoviesDict = Dict[str, Tuple[str, str]]  # movie_name -> (movie_id, genre)
 RatingsDict = Dict[str, List[Tuple[str, float]]]  # movie_name -> list of (user_id, rating)
+AveragesDict = Dict[str, float]  # movie_name -> average rating
+UserRatings = Tuple[List[str], array]  # (movie names, ratings as array('d')), parallel
+UserIndex = Dict[str, UserRatings]  # user_id -> the user's ratings
+GenreIndex = Dict[str, List[str]]  # genre -> list of movie_name
+
+
+class DerivedData(NamedTuple):
+    """Indexes built once from one (movies, ratings) pair by derive_data and shared by all queries."""
+    users: UserIndex  # user_index(ratings)
+    averages: AveragesDict  # movie_averages(ratings)
+    genres: GenreIndex  # genre_index(movies)
+    genre_avgs: Dict[str, float]  # genre_averages(movies, ratings)
+    rankings: GenreIndex  # genre_rankings(movies, ratings)
+
+
+# Read data files in large blocks instead of many small reads
+READ_BUFFER_SIZE = 1 << 20
+
+# Most distinct rating fields load_ratings remembers; enough for 0.5 or 0.1 steps in 0-5
+RATING_CACHE_SIZE = 64
+
+# The loaders define the data shapes: movies values are (movie_id, genre) and ratings entries are
+# (user_id: str, rating: float). Everything below relies on that instead of re-checking each entry.
+_rating_of = itemgetter(1)
+
+
+def _split_csv(line: str, lines: Iterable[str] = ()) -> List[str]:
+    """Split one pipe-delimited record exactly like csv.reader does, unquoting fields.
+
+    A quoted field may span line breaks: csv.reader then pulls the rest of the record from lines
+    (the open file), which leaves that iterator positioned at the next record.
+    """
+    return next(csv.reader(chain([line], lines), delimiter='|', quotechar='"'), [])
 
 
 def load_movies(filename: str) -> MoviesDict:
@@ -62,14 +90,19 @@ def load_movies(filename: str) -> MoviesDict:
     if not os.path.exists(filename):
         logging.error("movies file not found: %s", filename)
         return res
-    with open(filename, newline='', encoding='utf-8', errors='replace') as f:
-        reader = csv.reader(f, delimiter='|', quotechar='"')
-        header = next(reader, None)
-        for row_no, row in enumerate(reader, start=2):
+    with open(filename, newline='', encoding='utf-8', errors='replace', buffering=READ_BUFFER_SIZE) as f:
+        next(f, None)  # header
+        for row_no, line in enumerate(f, start=2):
+            # A plain split is much cheaper than csv; only quoted lines need the csv parser
+            row = line.split('|') if '"' not in line else _split_csv(line, f)
             if len(row) < 3:
-                logging.warning("movies: skipping malformed line %d: %r", row_no, row)
+                # The fast split keeps the line ending; report the fields as csv reads them
+                logging.warning("movies: skipping malformed line %d: %r", row_no,
+                                row if '"' in line else _split_csv(line))
                 continue
-            genre, mid, name = row[0].strip(), row[1].strip(), row[2].strip()
+            # Interned so every movie of a genre shares one genre string and the name is the same
+            # object load_ratings uses as its key: lookups across the dicts then match by identity
+            genre, mid, name = sys.intern(row[0].strip()), row[1].strip(), sys.intern(row[2].strip())
             if not name:
                 logging.warning("movies: empty movie name at line %d", row_no)
                 continue
@@ -99,63 +132,170 @@ def load_ratings(filename: str) -> RatingsDict:
     if not os.path.exists(filename):
         logging.error("ratings file not found: %s", filename)
         return res
-    with open(filename, newline='', encoding='utf-8', errors='replace') as f:
-        reader = csv.reader(f, delimiter='|', quotechar='"')
-        header = next(reader, None)
-        for row_no, row in enumerate(reader, start=2):
+    # Ratings usually take few distinct values (e.g. 0.5 steps in 0-5), so the first distinct fields
+    # are parsed and range-checked once and all rows with that value share a single float object.
+    # The cache is capped: free-form values like "3.14159" or " 4" are just parsed on every row.
+    parsed_ratings: Dict[str, float] = {}
+    with open(filename, newline='', encoding='utf-8', errors='replace', buffering=READ_BUFFER_SIZE) as f:
+        next(f, None)  # header
+        for row_no, line in enumerate(f, start=2):
+            # A plain split is much cheaper than csv; only quoted lines need the csv parser
+            row = line.split('|') if '"' not in line else _split_csv(line, f)
             if len(row) < 3:
-                logging.warning("ratings: skipping malformed line %d: %r", row_no, row)
+                # The fast split keeps the line ending; report the fields as csv reads them
+                logging.warning("ratings: skipping malformed line %d: %r", row_no,
+                                row if '"' in line else _split_csv(line))
                 continue
-            name, rating_str, user_id = row[0].strip(), row[1].strip(), row[2].strip()
+            # A user id repeats on every line that user rated; interning keeps one shared copy of it.
+            # The movie name is interned once, when it first becomes a key (see below).
+            name, user_id = row[0].strip(), sys.intern(row[2].strip())
             if not name:
                 logging.warning("ratings: empty movie name at line %d", row_no)
                 continue
-            try:
-                rating = float(rating_str)
-            except Exception:
-                logging.warning("ratings: bad rating at line %d: %r", row_no, rating_str)
-                continue
-            # Optional: enforce rating range 0-5
-            if not (0.0 <= rating <= 5.0):
-                logging.warning("ratings: out-of-range rating at line %d: %r", row_no, rating)
-                continue
-            res.setdefault(name, []).append((user_id, rating))
+            rating = parsed_ratings.get(row[1])
+            if rating is None:
+                try:
+                    # float() ignores surrounding whitespace itself, so the field is not stripped first
+                    rating = float(row[1])
+                except Exception:
+                    logging.warning("ratings: bad rating at line %d: %r", row_no, row[1].strip())
+                    continue
+                # Optional: enforce rating range 0-5
+                if not (0.0 <= rating <= 5.0):
+                    logging.warning("ratings: out-of-range rating at line %d: %r", row_no, rating)
+                    continue
+                if len(parsed_ratings) < RATING_CACHE_SIZE:
+                    parsed_ratings[row[1]] = rating
+            # Avoid setdefault here: it would allocate a throwaway list for every row
+            vals = res.get(name)
+            if vals is None:
+                vals = res[sys.intern(name)] = []
+            vals.append((user_id, rating))
     total = sum(len(v) for v in res.values())
     logging.info("Loaded %d ratings for %d movies from %s", total, len(res), filename)
     return res
 
 
-def top_movies(n: int, ratings: RatingsDict) -> List[str]:
+def _movie_average(vals: List[Tuple[str, float]]) -> Optional[float]:
+    """Return the average of one movie's (user_id, rating) entries, or None if it has none."""
+    if not vals:
+        return None
+    # map/itemgetter/sum keep the per-rating loop in C
+    return sum(map(_rating_of, vals)) / len(vals)
+
+
+def movie_averages(ratings: RatingsDict) -> AveragesDict:
+    """Aggregate the ratings of every movie in a single pass.
+
+    Args:
+        ratings: mapping movie_name -> list of (user_id, rating)
+
+    Returns:
+        dict mapping movie_name to its average rating (movies without ratings are omitted)
+    """
+    # One comprehension over the whole catalog: the per-rating loop runs in C, with no per-movie call
+    return {m: sum(map(_rating_of, vals)) / len(vals) for m, vals in ratings.items() if vals}
+
+
+def genre_index(movies: MoviesDict) -> GenreIndex:
+    """Bucket movie names by genre so a genre query only visits the movies of that genre.
+
+    Args:
+        movies: mapping movie_name -> (movie_id, movie_genre)
+
+    Returns:
+        dict mapping genre to list of movie names, in movies order
+    """
+    genres: GenreIndex = {}
+    for m_name, (_, movie_genre) in movies.items():
+        names = genres.get(movie_genre)
+        if names is None:
+            names = genres[movie_genre] = []
+        names.append(m_name)
+    return genres
+
+
+def _top_n(scores: Dict[str, float], n: int) -> List[str]:
+    """Return the n keys with the highest score, ties broken by key ascending."""
+    return _select_top(((-score, key) for key, score in scores.items()), len(scores), n)
+
+
+def _select_top(pairs: Iterable[Tuple[float, str]], size: int, n: int) -> List[str]:
+    """Return the keys of the n smallest (-score, key) pairs, in order.
+
+    Pairs are precomputed tuples, so ordering needs no Python key callback. size is the (upper bound
+    on the) number of pairs: a bounded heap wins while n is small relative to it and keeps only n
+    pairs in memory; once n * log2(n) reaches it a full sort is cheaper, so the strategy is picked
+    per call. A negative n slices like [:n], dropping that many from the end of the full order.
+    """
+    if 0 <= n and n * math.log2(max(n, 2)) < size:
+        return [key for _, key in heapq.nsmallest(n, pairs)]
+    return [key for _, key in sorted(pairs)[:n]]
+
+
+def top_movies(n: int, ratings: RatingsDict, derived: Optional[DerivedData] = None) -> List[str]:
     """Return the top-n movie names ranked by average rating.
 
     Args:
         n: number of top movies to return
         ratings: mapping movie_name -> list of (user_id, rating)
+        derived: optional derive_data(...) for the same data; its averages are then reused
 
     Returns:
         list of top-n movie names (strings)
     """
-    averages = {}
-    for m, vals in ratings.items():
-        nums = []
-        for item in vals:
-            if isinstance(item, (list, tuple)) and len(item) >= 2:
-                try:
-                    nums.append(float(item[1]))
-                except Exception:
-                    continue
-            else:
-                try:
-                    nums.append(float(item))
-                except Exception:
-                    continue
-        if nums:
-            averages[m] = sum(nums) / len(nums)
-    sorted_movies = sorted(averages.items(), key=lambda x: (-x[1], x[0]))
-    return [name for name, _ in sorted_movies[:n]]
+    if derived is None:
+        # Stream the averages straight into the selection instead of building a dict of all of them
+        pairs = ((-_movie_average(vals), m) for m, vals in ratings.items() if vals)
+        return _select_top(pairs, len(ratings), n)
+    return _top_n(derived.averages, n)
+
+
+def _genre_movie_averages(genre: str, movies: MoviesDict, ratings: RatingsDict,
+                          averages: Optional[AveragesDict] = None,
+                          genres: Optional[GenreIndex] = None) -> AveragesDict:
+    """Return movie_name -> average rating for the rated movies of one genre."""
+    if genres is not None:
+        names = genres.get(genre, [])
+    else:
+        names = [m_name for m_name, (_, movie_genre) in movies.items() if movie_genre == genre]
+    genre_movies = {}
+    for m_name in names:
+        if averages is not None:
+            avg = averages.get(m_name)
+        else:
+            avg = _movie_average(ratings.get(m_name, []))
+        if avg is not None:
+            genre_movies[m_name] = avg
+    return genre_movies
+
 
+def genre_rankings(movies: MoviesDict, ratings: RatingsDict, averages: Optional[AveragesDict] = None,
+                   genres: Optional[GenreIndex] = None) -> GenreIndex:
+    """Rank the rated movies of every genre by average rating, once for all later genre queries.
+
+    Args:
+        movies: mapping movie_name -> (movie_id, movie_genre)
+        ratings: mapping movie_name -> list of (user_id, rating)
+        averages: optional precomputed movie_averages(ratings)
+        genres: optional precomputed genre_index(movies)
 
-def top_movies_in_genre(n: int, genre: str, movies: MoviesDict, ratings: RatingsDict) -> List[str]:
+    Returns:
+        dict mapping genre to its rated movie names, best average first (ties by name)
+    """
+    if averages is None:
+        averages = movie_averages(ratings)
+    if genres is None:
+        genres = genre_index(movies)
+    rankings: GenreIndex = {}
+    for g in genres:
+        scores = _genre_movie_averages(g, movies, ratings, averages, genres)
+        rankings[g] = _top_n(scores, len(scores))
+    return rankings
+
+
+def top_movies_in_genre(n: int, genre: str, movies: MoviesDict, ratings: RatingsDict,
+                        derived: Optional[DerivedData] = None) -> List[str]:
     """Return the top-n movies in a given genre ranked by average rating.
 
     Args:
@@ -163,123 +303,145 @@ def top_movies_in_genre(n: int, genre: str, movies: MoviesDict, ratings: Ratings
         genre: genre string to filter by (exact match)
         movies: mapping movie_name -> (movie_id, movie_genre)
         ratings: mapping movie_name -> list of (user_id, rating)
+        derived: optional derive_data(...) for the same data; the answer is then a slice of its rankings
 
     Returns:
         list of top-n movie names in the genre
     """
-    genre_movies = {}
-    for m_name, info in movies.items():
-        movie_genre = None
-        if isinstance(info, (list, tuple)) and len(info) >= 2:
-            movie_genre = info[1]
-        elif isinstance(info, dict) and 'genre' in info:
-            movie_genre = info.get('genre')
-        if movie_genre == genre:
-            movie_ratings = ratings.get(m_name, [])
-            if not movie_ratings:
-                continue
-            vals = []
-            for item in movie_ratings:
-                if isinstance(item, (list, tuple)) and len(item) >= 2:
-                    try:
-                        vals.append(float(item[1]))
-                    except Exception:
-                        continue
-                else:
-                    try:
-                        vals.append(float(item))
-                    except Exception:
-                        continue
-            if vals:
-                avg = sum(vals) / len(vals)
-                genre_movies[m_name] = avg
-    sorted_movies = sorted(genre_movies.items(), key=lambda x: (-x[1], x[0]))
-    return [name for name, _ in sorted_movies[:n]]
-
-
-def top_genres(n: int, movies: MoviesDict, ratings: RatingsDict) -> List[str]:
+    if derived is not None:
+        return derived.rankings.get(genre, [])[:n]
+    return _top_n(_genre_movie_averages(genre, movies, ratings), n)
+
+
+def genre_averages(movies: MoviesDict, ratings: RatingsDict, averages: Optional[AveragesDict] = None,
+                   genres: Optional[GenreIndex] = None) -> Dict[str, float]:
+    """Return the average of movie averages for every genre.
+
+    This is the canonical genre score: each rated movie counts once however many ratings it has,
+    so it is the mean of movie means, not the mean of all ratings in the genre.
+
+    Args:
+        movies: mapping movie_name -> (movie_id, movie_genre)
+        ratings: mapping movie_name -> list of (user_id, rating)
+        averages: optional precomputed movie_averages(ratings)
+        genres: optional precomputed genre_index(movies); avoids re-bucketing every movie
+
+    Returns:
+        dict mapping genre to the mean of its rated movies' averages (genres without ratings are omitted)
+    """
+    if averages is None:
+        averages = movie_averages(ratings)
+    if genres is None:
+        genres = genre_index(movies)
+    genre_mean = {}
+    for g, names in genres.items():
+        # A running total in movies order, not sum(): from Python 3.12 sum() rounds floats
+        # differently, which would reorder genres whose means are close
+        total = 0.0
+        count = 0
+        for avg in map(averages.get, names):
+            if avg is not None:
+                total += avg
+                count += 1
+        if count:
+            genre_mean[g] = total / count
+    return genre_mean
+
+
+def top_genres(n: int, movies: MoviesDict, ratings: RatingsDict,
+               derived: Optional[DerivedData] = None) -> List[str]:
     """Return the top-n genres ranked by the average of average movie ratings per genre.
 
     Args:
         n: number of genres to return
         movies: mapping movie_name -> (movie_id, movie_genre)
         ratings: mapping movie_name -> list of (user_id, rating)
+        derived: optional derive_data(...) for the same data; only the top-n selection then runs
 
     Returns:
         list of top-n genres
     """
-    genre_avgs = {}
-    genre_counts = {}
-    for m_name, info in movies.items():
-        movie_genre = None
-        if isinstance(info, (list, tuple)) and len(info) >= 2:
-            movie_genre = info[1]
-        elif isinstance(info, dict) and 'genre' in info:
-            movie_genre = info.get('genre')
-        if movie_genre is None:
-            continue
-        movie_ratings = ratings.get(m_name, [])
-        nums = []
-        for item in movie_ratings:
-            if isinstance(item, (list, tuple)) and len(item) >= 2:
-                try:
-                    nums.append(float(item[1]))
-                except Exception:
-                    continue
-            else:
-                try:
-                    nums.append(float(item))
-                except Exception:
-                    continue
-        if nums:
-            avg = sum(nums) / len(nums)
-            genre_avgs[movie_genre] = genre_avgs.get(movie_genre, 0.0) + avg
-            genre_counts[movie_genre] = genre_counts.get(movie_genre, 0) + 1
-    genre_mean = {g: (genre_avgs[g] / genre_counts[g]) for g in genre_avgs}
-    sorted_genres = sorted(genre_mean.items(), key=lambda x: (-x[1], x[0]))
-    return [g for g, _ in sorted_genres[:n]]
+    genre_avgs = derived.genre_avgs if derived is not None else genre_averages(movies, ratings)
+    return _top_n(genre_avgs, n)
 
 
-def user_top_genre(user_id: str, movies: MoviesDict, ratings: RatingsDict) -> str:
-    """Return the genre that the given user prefers (highest average rating by user for movies in that genre).
+def user_index(ratings: RatingsDict) -> UserIndex:
+    """Invert the ratings mapping so each user's ratings can be looked up directly.
+
+    derive_data builds this once after loading, so a user_top_genre/recommend_movies query
+    only touches the ratings of that user instead of scanning every rating.
+
+    Args:
+        ratings: mapping movie_name -> list of (user_id, rating)
+
+    Returns:
+        dict mapping user_id to (movie names, ratings) in ratings order; the ratings are
+        kept in a parallel array('d') rather than one (name, rating) tuple per entry
+    """
+    users: UserIndex = {}
+    for m_name, vals in ratings.items():
+        for uid, r in vals:
+            entry = users.get(uid)
+            if entry is None:
+                entry = users[uid] = ([], array('d'))
+            entry[0].append(m_name)
+            entry[1].append(r)
+    return users
+
+
+def derive_data(movies: MoviesDict, ratings: RatingsDict) -> DerivedData:
+    """Build every index the queries can reuse, once per load.
+
+    Pass the result as derived= to the query functions together with the same movies and ratings;
+    the indexes are built from each other here, so they always describe one consistent data set.
 
     Args:
-        user_id: id of the user (string)
         movies: mapping movie_name -> (movie_id, movie_genre)
         ratings: mapping movie_name -> list of (user_id, rating)
 
     Returns:
-        genre string the user prefers, or empty string if no data
+        DerivedData for this movies/ratings pair
     """
-    genre_ratings = {}
-    for m_name, user_ratings in ratings.items():
-        for item in user_ratings:
-            uid = None
-            r = None
-            if isinstance(item, (list, tuple)) and len(item) >= 2:
-                uid, r = item[0], item[1]
-            else:
-                continue
-            if str(uid) != str(user_id):
-                continue
-            info = movies.get(m_name)
-            movie_genre = None
-            if isinstance(info, (list, tuple)) and len(info) >= 2:
-                movie_genre = info[1]
-            elif isinstance(info, dict) and 'genre' in info:
-                movie_genre = info.get('genre')
-            if movie_genre is None:
-                continue
-            try:
-                val = float(r)
-            except Exception:
-                continue
-            genre_ratings.setdefault(movie_genre, []).append(val)
+    averages = movie_averages(ratings)
+    genres = genre_index(movies)
+    return DerivedData(users=user_index(ratings), averages=averages, genres=genres,
+                       genre_avgs=genre_averages(movies, ratings, averages, genres),
+                       rankings=genre_rankings(movies, ratings, averages, genres))
+
+
+def _user_ratings(user_id: str, ratings: RatingsDict, users: Optional[UserIndex] = None) -> UserRatings:
+    """Return the (movie names, ratings) of one user, from the index when one is given."""
+    # Interned like the ids from load_ratings, so matching ids compare and hash-match by identity
+    target = sys.intern(str(user_id))
+    if users is not None:
+        entry = users.get(target)
+        return entry if entry is not None else ([], array('d'))
+    names, scores = [], array('d')
+    for m_name, vals in ratings.items():
+        for uid, r in vals:
+            if uid == target:
+                names.append(m_name)
+                scores.append(r)
+    return names, scores
+
+
+def _favorite_genre(names: List[str], scores: array, movies: MoviesDict) -> str:
+    """Return the genre with the highest average of the given ratings ('' if none of the movies is known)."""
+    # genre -> the user's ratings in that genre: one dict lookup per rating. They are reduced with
+    # sum() rather than a running total, since sum() rounds differently (compensated on 3.12+)
+    genre_vals = {}
+    for m_name, r in zip(names, scores):
+        info = movies.get(m_name)
+        if info is None:
+            continue
+        vals = genre_vals.get(info[1])
+        if vals is None:
+            genre_vals[info[1]] = [r]
+        else:
+            vals.append(r)
     best_genre = ''
     best_avg = -1
-    for g, vals in genre_ratings.items():
-        if not vals:
-            continue
+    for g, vals in genre_vals.items():
         avg = sum(vals) / len(vals)
         if avg > best_avg:
             best_avg = avg
@@ -287,29 +449,81 @@ def user_top_genre(user_id: str, movies: MoviesDict, ratings: RatingsDict) -> st
     return best_genre
 
 
-def recommend_movies(user_id: str, movies: MoviesDict, ratings: RatingsDict) -> List[str]:
+def _user_profile(user_id: str, movies: MoviesDict, ratings: RatingsDict,
+                  derived: Optional[DerivedData] = None) -> Tuple[str, Set[str]]:
+    """Return (favorite genre, names of rated movies) for a user from a single pass over their ratings.
+
+    The favorite genre is the one with the highest average rating by the user ('' if there is none).
+    """
+    names, scores = _user_ratings(user_id, ratings, derived.users if derived is not None else None)
+    return _favorite_genre(names, scores, movies), set(names)
+
+
+def user_top_genres(movies: MoviesDict, ratings: RatingsDict,
+                    derived: Optional[DerivedData] = None) -> Dict[str, str]:
+    """Return the preferred genre of every user, e.g. for an offline report.
+
+    All users are served from one user index, so the whole batch costs a single pass over the
+    ratings instead of one full scan per user.
+
+    Args:
+        movies: mapping movie_name -> (movie_id, movie_genre)
+        ratings: mapping movie_name -> list of (user_id, rating)
+        derived: optional derive_data(...) for the same data; its user index is then reused
+
+    Returns:
+        dict mapping user_id to genre string ('' for users whose rated movies have no known genre)
+    """
+    users = derived.users if derived is not None else user_index(ratings)
+    return {uid: _favorite_genre(names, scores, movies) for uid, (names, scores) in users.items()}
+
+
+def user_top_genre(user_id: str, movies: MoviesDict, ratings: RatingsDict,
+                   derived: Optional[DerivedData] = None) -> str:
+    """Return the genre that the given user prefers (highest average rating by user for movies in that genre).
+
+    Args:
+        user_id: id of the user (string)
+        movies: mapping movie_name -> (movie_id, movie_genre)
+        ratings: mapping movie_name -> list of (user_id, rating)
+        derived: optional derive_data(...) for the same data; avoids scanning all ratings
+
+    Returns:
+        genre string the user prefers, or empty string if no data
+    """
+    return _user_profile(user_id, movies, ratings, derived)[0]
+
+
+def recommend_movies(user_id: str, movies: MoviesDict, ratings: RatingsDict,
+                     derived: Optional[DerivedData] = None) -> List[str]:
     """Recommend up to 3 movies: most popular movies from the user's favorite genre that the user has not rated yet.
 
     Args:
         user_id: id of the user (string)
         movies: mapping movie_name -> (movie_id, movie_genre)
         ratings: mapping movie_name -> list of (user_id, rating)
+        derived: optional derive_data(...) for the same data; avoids scanning all ratings and
+            ranking the genre per call
 
     Returns:
         list of up to 3 recommended movie names
     """
-    fav = user_top_genre(user_id, movies, ratings)
+    fav, rated = _user_profile(user_id, movies, ratings, derived)
+    return _recommend_from_profile(fav, rated, movies, ratings, derived)
+
+
+def _recommend_from_profile(fav: str, rated: Set[str], movies: MoviesDict, ratings: RatingsDict,
+                            derived: Optional[DerivedData] = None) -> List[str]:
+    """Return up to 3 unrated movies from genre fav, given a profile from _user_profile."""
     if not fav:
         return []
-    rated = set()
-    for m_name, user_ratings in ratings.items():
-        for item in user_ratings:
-            if isinstance(item, (list, tuple)) and len(item) >= 2:
-                if str(item[0]) == str(user_id):
-                    rated.add(m_name)
-    candidates = top_movies_in_genre(50, fav, movies, ratings)
-    recs = [m for m in candidates if m not in rated]
-    return recs[:3]
+    if derived is not None:
+        # Walk the genre best-first and stop at the third unrated movie
+        return list(islice(filterfalse(rated.__contains__, derived.rankings.get(fav, [])), 3))
+    # Rank only the unrated movies of the genre so a fixed-size candidate list can never run short
+    pool = {m: avg for m, avg in _genre_movie_averages(fav, movies, ratings).items()
+            if m not in rated}
+    return _top_n(pool, 3)
 
 
 def _menu_load_data(state: dict):
@@ -317,11 +531,25 @@ def _menu_load_data(state: dict):
     ratings_file = input('Path to ratings file (default ratings.txt): ').strip() or 'ratings.txt'
     state['movies'] = load_movies(movies_file)
     state['ratings'] = load_ratings(ratings_file)
+    # Derived data is recomputed here only, so every query below reuses it until the next load
+    state['derived'] = derive_data(state['movies'], state['ratings'])
+    state['cache'] = {}
+
+
+def _memo(state: dict, key: tuple, compute):
+    """Return the cached result for key, computing it on first use.
+
+    The cache lives in state and is replaced by _menu_load_data, so results never outlive the data.
+    """
+    cache = state.setdefault('cache', {})
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
 
 
 def _menu_top_movies(state: dict):
     n = int(input('How many top movies? (n): '))
-    res = top_movies(n, state.get('ratings', {}))
+    res = _memo(state, ('top_movies', n), lambda: top_movies(n, state.get('ratings', {}), state.get('derived')))
     print('\nTop movies:')
     for i, m in enumerate(res, 1):
         print(f"{i}. {m}")
@@ -330,7 +558,9 @@ def _menu_top_movies(state: dict):
 def _menu_top_movies_in_genre(state: dict):
     genre = input('Genre: ').strip()
     n = int(input('How many top movies in this genre? (n): '))
-    res = top_movies_in_genre(n, genre, state.get('movies', {}), state.get('ratings', {}))
+    res = _memo(state, ('top_movies_in_genre', n, genre),
+                lambda: top_movies_in_genre(n, genre, state.get('movies', {}), state.get('ratings', {}),
+                                            state.get('derived')))
     print(f'\nTop {n} movies in {genre}:')
     for i, m in enumerate(res, 1):
         print(f"{i}. {m}")
@@ -338,21 +568,31 @@ def _menu_top_movies_in_genre(state: dict):
 
 def _menu_top_genres(state: dict):
     n = int(input('How many top genres? (n): '))
-    res = top_genres(n, state.get('movies', {}), state.get('ratings', {}))
+    res = _memo(state, ('top_genres', n),
+                lambda: top_genres(n, state.get('movies', {}), state.get('ratings', {}), state.get('derived')))
     print('\nTop genres:')
     for i, g in enumerate(res, 1):
         print(f"{i}. {g}")
 
 
+def _menu_user_profile(state: dict, user: str) -> Tuple[str, Set[str]]:
+    """Return the memoized (favorite genre, rated movies) of a user, shared by the per-user menu actions."""
+    return _memo(state, ('user_profile', user),
+                 lambda: _user_profile(user, state.get('movies', {}), state.get('ratings', {}), state.get('derived')))
+
+
 def _menu_user_top_genre(state: dict):
     user = input('User id: ').strip()
-    res = user_top_genre(user, state.get('movies', {}), state.get('ratings', {}))
+    res = _menu_user_profile(state, user)[0]
     print(f"\nUser {user} top genre: {res}")
 
 
 def _menu_recommend(state: dict):
     user = input('User id: ').strip()
-    res = recommend_movies(user, state.get('movies', {}), state.get('ratings', {}))
+    fav, rated = _menu_user_profile(state, user)
+    res = _memo(state, ('recommend_movies', user),
+                lambda: _recommend_from_profile(fav, rated, state.get('movies', {}), state.get('ratings', {}),
+                                                state.get('derived')))
     print(f"\nRecommendations for user {user}:")
     if not res:
         print('  (no recommendations)')
@@ -361,7 +601,7 @@ def _menu_recommend(state: dict):
 
 
 def main():
-    state = {'movies': {}, 'ratings': {}}
+    state = {'movies': {}, 'ratings': {}, 'derived': None, 'cache': {}}
     actions = [
         ('Load data files', _menu_load_data),
         ('Top n movies (overall)', _menu_top_movies),
@@ -0,0 +1,188 @@
+import os
+import tempfile
+import unittest
+
+import movie_recommender as mr
+
+
+class LoadersTest(unittest.TestCase):
+
+    def _write(self, text):
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_quoted_name_spanning_lines(self):
+        movies = mr.load_movies(self._write(
+            'movie_genre|movie_id|movie_name\r\nDrama|1|"Multi\r\nLine"\r\nComedy|2|Plain\r\n'))
+        self.assertEqual(movies, {'Multi\r\nLine': (1, 'Drama'), 'Plain': (2, 'Comedy')})
+        ratings = mr.load_ratings(self._write(
+            'movie_name|rating|user_id\r\n"Multi\r\nLine"|4|u1\r\nPlain|3|u2\r\n'))
+        self.assertEqual(ratings, {'Multi\r\nLine': [('u1', 4.0)], 'Plain': [('u2', 3.0)]})
+
+    def test_malformed_line_warning_has_no_line_ending(self):
+        path = self._write('movie_genre|movie_id|movie_name\r\nDrama|1\r\n\r\nComedy|2|Ok\r\n')
+        with self.assertLogs(level='WARNING') as logs:
+            movies = mr.load_movies(path)
+        self.assertEqual(movies, {'Ok': (2, 'Comedy')})
+        self.assertEqual(logs.output, ["WARNING:root:movies: skipping malformed line 2: ['Drama', '1']",
+                                       'WARNING:root:movies: skipping malformed line 3: []'])
+        path = self._write('movie_name|rating|user_id\r\nOk|3\r\n\r\nOk|4|u\r\n')
+        with self.assertLogs(level='WARNING') as logs:
+            ratings = mr.load_ratings(path)
+        self.assertEqual(ratings, {'Ok': [('u', 4.0)]})
+        self.assertEqual(logs.output, ["WARNING:root:ratings: skipping malformed line 2: ['Ok', '3']",
+                                       'WARNING:root:ratings: skipping malformed line 3: []'])
+
+    def test_many_distinct_ratings_all_parsed(self):
+        count = mr.RATING_CACHE_SIZE * 2
+        lines = ''.join(f'Movie|{i / count * 5:.6f}|u{i}\n' for i in range(count))
+        ratings = mr.load_ratings(self._write('movie_name|rating|user_id\n' + lines + 'Movie|9|bad\n'))
+        self.assertEqual(ratings['Movie'], [(f'u{i}', float(f'{i / count * 5:.6f}')) for i in range(count)])
+
+
+def _catalog():
+    """60 Drama movies with strictly decreasing averages plus two Comedy movies.
+
+    User 'fan' rated the 55 best Drama movies (with the same score as everyone else, so the
+    averages are unchanged) and nothing else.
+    """
+    movies = {}
+    ratings = {}
+    for i in range(60):
+        name = f'Drama {i:02d}'
+        score = 5.0 - i * 0.05
+        movies[name] = (i, 'Drama')
+        ratings[name] = [('critic', score)]
+        if i < 55:
+            ratings[name].append(('fan', score))
+    movies['Comedy A'] = (100, 'Comedy')
+    movies['Comedy B'] = (101, 'Comedy')
+    ratings['Comedy A'] = [('critic', 4.0)]
+    ratings['Comedy B'] = [('critic', 3.0)]
+    return movies, ratings
+
+
+class RecommendMoviesTest(unittest.TestCase):
+
+    def test_returns_three_when_user_rated_more_than_fifty_top_movies(self):
+        movies, ratings = _catalog()
+        recs = mr.recommend_movies('fan', movies, ratings)
+        self.assertEqual(recs, ['Drama 55', 'Drama 56', 'Drama 57'])
+
+    def test_precomputed_paths_match_fallback(self):
+        movies, ratings = _catalog()
+        derived = mr.derive_data(movies, ratings)
+        for user in ('fan', 'critic', 'nobody'):
+            self.assertEqual(mr.recommend_movies(user, movies, ratings, derived),
+                             mr.recommend_movies(user, movies, ratings))
+
+
+def _mixed_catalog():
+    """Three genres with tied averages, plus ratings for movies that are missing from movies.
+
+    User 'ghost' only rated the unknown movies, so no genre can be derived for them.
+    """
+    movies = {
+        'Alien': (1, 'Horror'),
+        'Brazil': (2, 'Comedy'),
+        'Casablanca': (3, 'Drama'),
+        'Dune': (4, 'Drama'),
+        'Eraserhead': (5, 'Horror'),
+        'Fargo': (6, 'Comedy'),
+        'Gattaca': (7, 'Drama'),
+        'Unrated': (8, 'Western'),
+    }
+    ratings = {
+        'Alien': [('ann', 4.0), ('bob', 2.0)],
+        'Brazil': [('ann', 3.0), ('cid', 5.0)],
+        'Casablanca': [('bob', 5.0), ('cid', 3.0)],
+        'Dune': [('ann', 4.0)],
+        'Eraserhead': [('bob', 3.0), ('cid', 5.0)],
+        'Fargo': [('cid', 4.0)],
+        'Gattaca': [('ann', 1.0), ('bob', 5.0)],
+        'Lost 1': [('ghost', 5.0), ('ann', 2.0)],
+        'Lost 2': [('ghost', 1.0)],
+    }
+    return movies, ratings
+
+
+class UserTopGenresTest(unittest.TestCase):
+
+    def test_matches_user_top_genre_for_every_user(self):
+        movies, ratings = _mixed_catalog()
+        batch = mr.user_top_genres(movies, ratings)
+        self.assertEqual(set(batch), {'ann', 'bob', 'cid', 'ghost'})
+        for user, genre in batch.items():
+            self.assertEqual(genre, mr.user_top_genre(user, movies, ratings))
+        self.assertEqual(batch['ghost'], '')
+
+    def test_genre_mean_rounds_like_sum(self):
+        movies = {'m0': (0, 'g1'), 'm2': (2, 'g0'), 'm4': (4, 'g1'), 'm6': (6, 'g1')}
+        ratings = {'m0': [('u', 0.4)], 'm2': [('u', 3.1)], 'm4': [('u', 4.1)], 'm6': [('u', 4.8)]}
+        # The g1 mean is 3.1 only up to rounding; which side it lands on depends on how sum() adds
+        # (compensated from Python 3.12), and a running total lands on the other side there
+        expected = 'g0' if sum([0.4, 4.1, 4.8]) / 3 < 3.1 else 'g1'
+        self.assertEqual(mr.user_top_genre('u', movies, ratings), expected)
+        self.assertEqual(mr.user_top_genres(movies, ratings), {'u': expected})
+
+    def test_derived_data_matches_fallback(self):
+        movies, ratings = _mixed_catalog()
+        derived = mr.derive_data(movies, ratings)
+        self.assertEqual(mr.user_top_genres(movies, ratings, derived), mr.user_top_genres(movies, ratings))
+        for user in ('ann', 'bob', 'cid', 'ghost', 'nobody'):
+            self.assertEqual(mr.user_top_genre(user, movies, ratings, derived),
+                             mr.user_top_genre(user, movies, ratings))
+        for n in (0, 1, 3, 10):
+            self.assertEqual(mr.top_movies(n, ratings, derived), mr.top_movies(n, ratings))
+            self.assertEqual(mr.top_genres(n, movies, ratings, derived), mr.top_genres(n, movies, ratings))
+
+
+class TopGenresTest(unittest.TestCase):
+
+    def test_genre_mean_is_a_running_total_in_movies_order(self):
+        movies = {'a1': (1, 'A'), 'a2': (2, 'A'), 'a3': (3, 'A'), 'b1': (4, 'B')}
+        ratings = {'a1': [('u', 1.6)], 'a2': [('u', 4.4)], 'a3': [('u', 0.6)], 'b1': [('u', 2.2)]}
+        # 1.6 + 4.4 + 0.6 added left to right is just below 6.6, so A ranks below B; sum() on
+        # Python 3.12+ would make the two genres tie and put A first by name
+        self.assertEqual(mr.top_genres(2, movies, ratings), ['B', 'A'])
+        self.assertEqual(mr.top_genres(2, movies, ratings, mr.derive_data(movies, ratings)), ['B', 'A'])
+
+class GenreRankingsTest(unittest.TestCase):
+
+    def test_matches_top_movies_in_genre_for_every_genre(self):
+        movies, ratings = _mixed_catalog()
+        rankings = mr.genre_rankings(movies, ratings)
+        self.assertEqual(set(rankings), {'Horror', 'Comedy', 'Drama', 'Western'})
+        for genre, ranked in rankings.items():
+            self.assertEqual(ranked, mr.top_movies_in_genre(len(movies), genre, movies, ratings))
+        self.assertEqual(rankings['Western'], [])
+
+    def test_sliced_rankings_match_fallback(self):
+        movies, ratings = _mixed_catalog()
+        derived = mr.derive_data(movies, ratings)
+        for genre in ('Horror', 'Comedy', 'Drama', 'Western', 'Unknown'):
+            for n in (0, 1, 2, 5):
+                self.assertEqual(mr.top_movies_in_genre(n, genre, movies, ratings, derived),
+                                 mr.top_movies_in_genre(n, genre, movies, ratings))
+
+
+class NegativeNTest(unittest.TestCase):
+
+    def test_negative_n_slices_like_the_full_list(self):
+        movies, ratings = _mixed_catalog()
+        derived = mr.derive_data(movies, ratings)
+        full = mr.top_movies(len(ratings), ratings)
+        genre_full = mr.top_movies_in_genre(len(movies), 'Drama', movies, ratings)
+        for n in (-1, -2, -100):
+            self.assertEqual(mr.top_movies(n, ratings), full[:n])
+            self.assertEqual(mr.top_movies(n, ratings, derived), full[:n])
+            self.assertEqual(mr.top_movies_in_genre(n, 'Drama', movies, ratings), genre_full[:n])
+            self.assertEqual(mr.top_movies_in_genre(n, 'Drama', movies, ratings, derived),
+                             genre_full[:n])
+
+
+if __name__ == '__main__':
+    unittest.main()